@@ -6,13 +6,20 @@ to create training datasets for the graph neural network.
 """
 import random
 import os
-from itertools import combinations, chain
+from multiprocessing import Pool
 
 
 # Constants
 CUBE_SIZE = 0.8
 DEFAULT_COLOR = [0.5, 0.5, 0.5]
 
+# Shape/color part shared by every object line, formatted once at import
+OBJECT_LINE_SUFFIX = (f'shape: ssBox, size: [{CUBE_SIZE}, {CUBE_SIZE}, {CUBE_SIZE}, .01], '
+                      f'color: [{DEFAULT_COLOR[0]}, {DEFAULT_COLOR[1]}, {DEFAULT_COLOR[2]}]}}\n')
+
+# Separator line between samples in a .gbundle file
+BUNDLE_DELIMITER = "---\n"
+
 
 def random_uniform_rounded(low, high, decimal_places=2):
     """Generate a random float rounded to specified decimal places."""
@@ -27,14 +34,18 @@ def random_offset():
         return random_uniform_rounded(-1.5, -1)
 
 
-def generate_unique_numbers(n, start, end):
+def generate_unique_numbers(n, start, end, spacing=0.2):
     """Generate n unique numbers within range [start, end] with minimum spacing."""
-    unique_numbers = set()
-    while len(unique_numbers) < n:
-        number = random.uniform(start, end)
-        if all(abs(number - existing_number) >= 0.2 for existing_number in unique_numbers):
-            unique_numbers.add(number)
-    return list(unique_numbers)
+    low, high = min(start, end), max(start, end)
+    slack = (high - low) - (n - 1) * spacing
+    if slack < 0:
+        raise ValueError(f"Cannot fit {n} numbers with spacing {spacing} in [{low}, {high}]")
+    
+    # Sample in the range left after reserving the gaps, then re-insert them
+    offsets = sorted(slack * random.random() for _ in range(n))
+    unique_numbers = [low + offset + i * spacing for i, offset in enumerate(offsets)]
+    random.shuffle(unique_numbers)
+    return unique_numbers
 
 
 def generate_random_rgb():
@@ -56,34 +67,191 @@ def generate_instance(num_objects=None):
         num_objects = random.randint(2, 6)
     
     objects = list(range(1, num_objects + 1))
-    all_groupings = list(chain(*[combinations(objects, i) for i in range(1, num_objects + 1)]))
+    random.shuffle(objects)
     
+    # Peel random-sized groups off the shuffled objects to form a partition
     sampled_groupings = []
-    while objects:
-        group = random.choice(all_groupings)
-        sampled_groupings.append(group)
-        for obj in group:
-            objects.remove(obj)
-            all_groupings = [g for g in all_groupings if obj not in g]
+    start = 0
+    while start < num_objects:
+        group_size = random.randint(1, num_objects - start)
+        sampled_groupings.append(tuple(sorted(objects[start:start + group_size])))
+        start += group_size
     
     return sampled_groupings
 
 
-def write_object_base(file, obj_id, x_pos, y_pos, z_pos):
-    """Write a base object (not stacked on another) to file."""
-    line = (f'object{obj_id}: {{ X: [{x_pos}, {y_pos}, {z_pos}, 0.3, 0, 0, 0], '
-            f'shape: ssBox, size: [{CUBE_SIZE}, {CUBE_SIZE}, {CUBE_SIZE}, .01], '
-            f'color: [{DEFAULT_COLOR[0]}, {DEFAULT_COLOR[1]}, {DEFAULT_COLOR[2]}]}}')
-    file.write(line + "\n")
+def write_object_base(obj_id, x_pos, y_pos, z_pos):
+    """Format a base object (not stacked on another) as a .g line."""
+    return f'object{obj_id}: {{ X: [{x_pos}, {y_pos}, {z_pos}, 0.3, 0, 0, 0], ' + OBJECT_LINE_SUFFIX
+
+
+def write_object_stacked(obj_id, base_obj_id, tx, ty, tz, angle=0):
+    """Format a stacked object (on top of another) as a .g line."""
+    return (f'object{obj_id}(object{base_obj_id}): {{ '
+            f'Q: "t({tx} {ty} {tz}) d({angle} 0 0 1)", ' + OBJECT_LINE_SUFFIX)
+
+
+def format_random_stacks_sample(min_objects=2, max_objects=6):
+    """Format a single random stack sample as a list of .g lines."""
+    instances = generate_instance(random.randint(min_objects, max_objects))
+    
+    x_offsets = generate_unique_numbers(len(instances), 3, -3)
+    y_offsets = generate_unique_numbers(len(instances), 3, -3)
+    
+    buf = []
+    for idx, instance in enumerate(instances):
+        k = len(instance)
+        x_pos = x_offsets[idx]
+        y_pos = y_offsets[idx]
+        
+        # Write base object
+        buf.append(write_object_base(instance[0], x_pos, y_pos, CUBE_SIZE / 2))
+        
+        # Write stacked objects
+        for j in range(1, k):
+            angle_random = random.randrange(181)
+            tx = 0.1 * random.random()
+            ty = 0.1 * random.random()
+            tz = CUBE_SIZE
+            buf.append(write_object_stacked(
+                instance[j], instance[j - 1], tx, ty, tz, angle_random
+            ))
+    
+    return buf
+
+
+def format_pyramid_sample(min_objects=2, max_objects=5):
+    """Format a single pyramid sample as a list of .g lines."""
+    num_objects = random.randint(min_objects, max_objects)
+    object_count = 0
+    
+    buf = []
+    layer = 0
+    current_layer_objects = num_objects
+    
+    while current_layer_objects > 0:
+        # Calculate x positions for this layer
+        x_offsets = [j * 0.8 - (2 - 0.4 * layer) for j in range(1, current_layer_objects + 1)]
+        for j in range(1, len(x_offsets)):
+            x_offsets[j] = x_offsets[j - 1] + random.random() * 0.2 + 0.8
+        
+        z_positions = [0.4 + 0.8 * layer] * current_layer_objects
+        x_offsets = [round(x, 3) for x in x_offsets]
+        z_positions = [round(z, 3) for z in z_positions]
+        
+        # Write objects for this layer
+        for j in range(current_layer_objects):
+            object_count += 1
+            buf.append(write_object_base(object_count, x_offsets[j], 0, z_positions[j]))
+        
+        current_layer_objects -= 1
+        layer += 1
+    
+    return buf
+
+
+def format_pattern1_sample():
+    """Format a single pattern 1 sample as a list of .g lines."""
+    x_offsets = random.uniform(3, -3)
+    y_offsets = random.uniform(3, -3)
+    
+    buf = []
+    # Base objects
+    buf.append(write_object_base(1, x_offsets, y_offsets, 0))
+    buf.append(write_object_base(2, x_offsets + random.uniform(0.5, 0) + CUBE_SIZE, y_offsets, 0))
+    buf.append(write_object_base(3, x_offsets + random.uniform(0.5, 0) + CUBE_SIZE, y_offsets, 0))
+    
+    # Stack on object 1
+    tx = CUBE_SIZE / 2
+    tz = CUBE_SIZE + random.uniform(0.5, 0)
+    buf.append(write_object_stacked(4, 1, tx, 0, tz, 0))
+    
+    # Stack on object 2
+    buf.append(write_object_stacked(5, 2, tx, 0, tz, 0))
+    
+    # Stack on object 4
+    buf.append(write_object_stacked(6, 4, tx, 0, tz, 0))
+    
+    return buf
+
+
+def format_pattern2_sample():
+    """Format a single pattern 2 sample as a list of .g lines."""
+    x_offsets = random.uniform(3, -3)
+    y_offsets = random.uniform(3, -3)
+    
+    buf = []
+    # Base objects
+    buf.append(write_object_base(1, x_offsets, y_offsets, 0))
+    buf.append(write_object_base(2, x_offsets + random.uniform(0.5, 0) + CUBE_SIZE, y_offsets, 0))
+    
+    # Stack on object 1
+    tx = -CUBE_SIZE / 2
+    tz = CUBE_SIZE + random.uniform(0.5, 0)
+    buf.append(write_object_stacked(3, 1, tx, 0, tz, 0))
+    
+    # Stack on object 2
+    buf.append(write_object_stacked(4, 2, tx, 0, tz, 0))
+    
+    return buf
+
+
+def format_pattern3_sample():
+    """Format a single pattern 3 sample as a list of .g lines."""
+    x_offsets = random.uniform(3, -3)
+    y_offsets = random.uniform(3, -3)
+    
+    buf = []
+    # Base objects
+    buf.append(write_object_base(1, x_offsets, y_offsets, 0))
+    buf.append(write_object_base(2, x_offsets + random.uniform(0.5, 0) + CUBE_SIZE, y_offsets, 0))
+    
+    # Stack on object 1
+    tx = CUBE_SIZE / 2
+    tz = CUBE_SIZE + random.uniform(0.5, 0)
+    buf.append(write_object_stacked(3, 1, tx, 0, tz, 0))
+    
+    # Stack on object 2
+    buf.append(write_object_stacked(4, 2, tx, 0, tz, 0))
+    
+    # Stack on object 3
+    buf.append(write_object_stacked(5, 3, tx, 0, tz, 0))
+    
+    return buf
 
 
-def write_object_stacked(file, obj_id, base_obj_id, tx, ty, tz, angle=0):
-    """Write a stacked object (on top of another) to file."""
-    line = (f'object{obj_id}(object{base_obj_id}): {{ '
-            f'Q: "t({tx} {ty} {tz}) d({angle} 0 0 1)", '
-            f'shape: ssBox, size: [{CUBE_SIZE}, {CUBE_SIZE}, {CUBE_SIZE}, .01], '
-            f'color: [{DEFAULT_COLOR[0]}, {DEFAULT_COLOR[1]}, {DEFAULT_COLOR[2]}]}}')
-    file.write(line + "\n")
+def format_pattern4_sample():
+    """Format a single pattern 4 sample as a list of .g lines."""
+    x_offsets = random.uniform(3, -3)
+    y_offsets = random.uniform(3, -3)
+    
+    buf = []
+    # Base objects
+    buf.append(write_object_base(1, x_offsets, y_offsets, 0))
+    buf.append(write_object_base(2, x_offsets + random.uniform(0.5, 0) + CUBE_SIZE, y_offsets, 0))
+    
+    # Stack on object 1
+    tx = CUBE_SIZE / 2
+    tz = CUBE_SIZE + random.uniform(0.5, 0)
+    buf.append(write_object_stacked(3, 1, tx, 0, tz, 0))
+    
+    # Stack on object 3
+    buf.append(write_object_stacked(4, 3, tx, 0, tz, 0))
+    
+    return buf
+
+
+def write_sample(file_name, format_sample, **kwargs):
+    """Write a single sample produced by format_sample to its own .g file."""
+    with open(file_name, "w") as file:
+        file.writelines(format_sample(**kwargs))
+
+
+def write_bundle(file_name, format_sample, num_samples, **kwargs):
+    """Write num_samples samples produced by format_sample into one bundle file."""
+    samples = ["".join(format_sample(**kwargs)) for _ in range(num_samples)]
+    with open(file_name, "w") as file:
+        file.write(BUNDLE_DELIMITER.join(samples))
 
 
 def generate_random_stacks_pattern(output_dir, num_files, start_index=1, min_objects=2, max_objects=6):
@@ -95,30 +263,8 @@ def generate_random_stacks_pattern(output_dir, num_files, start_index=1, min_obj
     os.makedirs(output_dir, exist_ok=True)
     
     for i in range(num_files):
-        instances = generate_instance(random.randint(min_objects, max_objects))
         file_name = os.path.join(output_dir, f"sample_{start_index + i}.g")
-        
-        x_offsets = generate_unique_numbers(len(instances), 3, -3)
-        y_offsets = generate_unique_numbers(len(instances), 3, -3)
-        
-        with open(file_name, "w") as file:
-            for idx, instance in enumerate(instances):
-                k = len(instance)
-                x_pos = x_offsets[idx]
-                y_pos = y_offsets[idx]
-                
-                # Write base object
-                write_object_base(file, instance[0], x_pos, y_pos, CUBE_SIZE / 2)
-                
-                # Write stacked objects
-                for j in range(1, k):
-                    angle_random = random.randint(0, 180)
-                    tx = random.uniform(0, 0.1)
-                    ty = random.uniform(0, 0.1)
-                    tz = CUBE_SIZE
-                    write_object_stacked(
-                        file, instance[j], instance[j - 1], tx, ty, tz, angle_random
-                    )
+        write_sample(file_name, format_random_stacks_sample, min_objects=min_objects, max_objects=max_objects)
     
     print(f"Generated {num_files} random stack pattern files in {output_dir}")
 
@@ -131,30 +277,7 @@ def generate_pyramid_pattern(output_dir, num_files, start_index=1, min_objects=2
     
     for i in range(num_files):
         file_name = os.path.join(output_dir, f"sample_{start_index + i}.g")
-        num_objects = random.randint(min_objects, max_objects)
-        object_count = 0
-        
-        with open(file_name, "w") as file:
-            layer = 0
-            current_layer_objects = num_objects
-            
-            while current_layer_objects > 0:
-                # Calculate x positions for this layer
-                x_offsets = [j * 0.8 - (2 - 0.4 * layer) for j in range(1, current_layer_objects + 1)]
-                for j in range(1, len(x_offsets)):
-                    x_offsets[j] = x_offsets[j - 1] + random.random() * 0.2 + 0.8
-                
-                z_positions = [0.4 + 0.8 * layer] * current_layer_objects
-                x_offsets = [round(x, 3) for x in x_offsets]
-                z_positions = [round(z, 3) for z in z_positions]
-                
-                # Write objects for this layer
-                for j in range(current_layer_objects):
-                    object_count += 1
-                    write_object_base(file, object_count, x_offsets[j], 0, z_positions[j])
-                
-                current_layer_objects -= 1
-                layer += 1
+        write_sample(file_name, format_pyramid_sample, min_objects=min_objects, max_objects=max_objects)
     
     print(f"Generated {num_files} pyramid pattern files in {output_dir}")
 
@@ -167,26 +290,7 @@ def generate_pattern1(output_dir, num_files, start_index=1):
     os.makedirs(output_dir, exist_ok=True)
     
     for i in range(num_files):
-        file_name = os.path.join(output_dir, f"sample_{start_index + i}.g")
-        x_offsets = random.uniform(3, -3)
-        y_offsets = random.uniform(3, -3)
-        
-        with open(file_name, "w") as file:
-            # Base objects
-            write_object_base(file, 1, x_offsets, y_offsets, 0)
-            write_object_base(file, 2, x_offsets + random.uniform(0.5, 0) + CUBE_SIZE, y_offsets, 0)
-            write_object_base(file, 3, x_offsets + random.uniform(0.5, 0) + CUBE_SIZE, y_offsets, 0)
-            
-            # Stack on object 1
-            tx = CUBE_SIZE / 2
-            tz = CUBE_SIZE + random.uniform(0.5, 0)
-            write_object_stacked(file, 4, 1, tx, 0, tz, 0)
-            
-            # Stack on object 2
-            write_object_stacked(file, 5, 2, tx, 0, tz, 0)
-            
-            # Stack on object 4
-            write_object_stacked(file, 6, 4, tx, 0, tz, 0)
+        write_sample(os.path.join(output_dir, f"sample_{start_index + i}.g"), format_pattern1_sample)
     
     print(f"Generated {num_files} pattern1 files in {output_dir}")
 
@@ -199,22 +303,7 @@ def generate_pattern2(output_dir, num_files, start_index=1):
     os.makedirs(output_dir, exist_ok=True)
     
     for i in range(num_files):
-        file_name = os.path.join(output_dir, f"sample_{start_index + i}.g")
-        x_offsets = random.uniform(3, -3)
-        y_offsets = random.uniform(3, -3)
-        
-        with open(file_name, "w") as file:
-            # Base objects
-            write_object_base(file, 1, x_offsets, y_offsets, 0)
-            write_object_base(file, 2, x_offsets + random.uniform(0.5, 0) + CUBE_SIZE, y_offsets, 0)
-            
-            # Stack on object 1
-            tx = -CUBE_SIZE / 2
-            tz = CUBE_SIZE + random.uniform(0.5, 0)
-            write_object_stacked(file, 3, 1, tx, 0, tz, 0)
-            
-            # Stack on object 2
-            write_object_stacked(file, 4, 2, tx, 0, tz, 0)
+        write_sample(os.path.join(output_dir, f"sample_{start_index + i}.g"), format_pattern2_sample)
     
     print(f"Generated {num_files} pattern2 files in {output_dir}")
 
@@ -227,25 +316,7 @@ def generate_pattern3(output_dir, num_files, start_index=1):
     os.makedirs(output_dir, exist_ok=True)
     
     for i in range(num_files):
-        file_name = os.path.join(output_dir, f"sample_{start_index + i}.g")
-        x_offsets = random.uniform(3, -3)
-        y_offsets = random.uniform(3, -3)
-        
-        with open(file_name, "w") as file:
-            # Base objects
-            write_object_base(file, 1, x_offsets, y_offsets, 0)
-            write_object_base(file, 2, x_offsets + random.uniform(0.5, 0) + CUBE_SIZE, y_offsets, 0)
-            
-            # Stack on object 1
-            tx = CUBE_SIZE / 2
-            tz = CUBE_SIZE + random.uniform(0.5, 0)
-            write_object_stacked(file, 3, 1, tx, 0, tz, 0)
-            
-            # Stack on object 2
-            write_object_stacked(file, 4, 2, tx, 0, tz, 0)
-            
-            # Stack on object 3
-            write_object_stacked(file, 5, 3, tx, 0, tz, 0)
+        write_sample(os.path.join(output_dir, f"sample_{start_index + i}.g"), format_pattern3_sample)
     
     print(f"Generated {num_files} pattern3 files in {output_dir}")
 
@@ -258,36 +329,34 @@ def generate_pattern4(output_dir, num_files, start_index=1):
     os.makedirs(output_dir, exist_ok=True)
     
     for i in range(num_files):
-        file_name = os.path.join(output_dir, f"sample_{start_index + i}.g")
-        x_offsets = random.uniform(3, -3)
-        y_offsets = random.uniform(3, -3)
-        
-        with open(file_name, "w") as file:
-            # Base objects
-            write_object_base(file, 1, x_offsets, y_offsets, 0)
-            write_object_base(file, 2, x_offsets + random.uniform(0.5, 0) + CUBE_SIZE, y_offsets, 0)
-            
-            # Stack on object 1
-            tx = CUBE_SIZE / 2
-            tz = CUBE_SIZE + random.uniform(0.5, 0)
-            write_object_stacked(file, 3, 1, tx, 0, tz, 0)
-            
-            # Stack on object 3
-            write_object_stacked(file, 4, 3, tx, 0, tz, 0)
+        write_sample(os.path.join(output_dir, f"sample_{start_index + i}.g"), format_pattern4_sample)
     
     print(f"Generated {num_files} pattern4 files in {output_dir}")
 
 
+def _seed_worker():
+    """Reseed each pool worker so forked processes do not share a random stream."""
+    random.seed()
+
+
+def _run_task(task):
+    """Run one (writer, args, kwargs) task tuple."""
+    writer, args, kwargs = task
+    writer(*args, **kwargs)
+
+
 def main():
     """Main function to generate all dataset patterns."""
     # Configuration
     OUTPUT_BASE_DIR = "dataset"
+    # Samples per .gbundle file; 0 writes one .g file per sample instead
+    SAMPLES_PER_BUNDLE = 1000
     
     # Pattern generation parameters
     patterns_config = [
         {
             "name": "random_stacks",
-            "func": generate_random_stacks_pattern,
+            "func": format_random_stacks_sample,
             "output_dir": os.path.join(OUTPUT_BASE_DIR, "random_stacks"),
             "num_files": 20000,
             "start_index": 1,
@@ -295,7 +364,7 @@ def main():
         },
         {
             "name": "pyramid",
-            "func": generate_pyramid_pattern,
+            "func": format_pyramid_sample,
             "output_dir": os.path.join(OUTPUT_BASE_DIR, "pyramid"),
             "num_files": 10000,
             "start_index": 1,
@@ -303,7 +372,7 @@ def main():
         },
         {
             "name": "pattern1",
-            "func": generate_pattern1,
+            "func": format_pattern1_sample,
             "output_dir": os.path.join(OUTPUT_BASE_DIR, "pattern1"),
             "num_files": 1000,
             "start_index": 20001,
@@ -311,7 +380,7 @@ def main():
         },
         {
             "name": "pattern2",
-            "func": generate_pattern2,
+            "func": format_pattern2_sample,
             "output_dir": os.path.join(OUTPUT_BASE_DIR, "pattern2"),
             "num_files": 1000,
             "start_index": 21001,
@@ -319,7 +388,7 @@ def main():
         },
         {
             "name": "pattern3",
-            "func": generate_pattern3,
+            "func": format_pattern3_sample,
             "output_dir": os.path.join(OUTPUT_BASE_DIR, "pattern3"),
             "num_files": 1000,
             "start_index": 22001,
@@ -327,7 +396,7 @@ def main():
         },
         {
             "name": "pattern4",
-            "func": generate_pattern4,
+            "func": format_pattern4_sample,
             "output_dir": os.path.join(OUTPUT_BASE_DIR, "pattern4"),
             "num_files": 1000,
             "start_index": 23001,
@@ -339,19 +408,32 @@ def main():
     print(f"Total patterns to generate: {len(patterns_config)}")
     print("-" * 50)
     
+    # Every sample is independent, so dispatch them all across worker processes
+    tasks = []
+    for config in patterns_config:
+        os.makedirs(config["output_dir"], exist_ok=True)
+        if SAMPLES_PER_BUNDLE:
+            for b, first in enumerate(range(0, config["num_files"], SAMPLES_PER_BUNDLE)):
+                file_name = os.path.join(config["output_dir"], f"bundle_{b:04d}.gbundle")
+                num_samples = min(SAMPLES_PER_BUNDLE, config["num_files"] - first)
+                tasks.append((write_bundle, (file_name, config["func"], num_samples), config["kwargs"]))
+        else:
+            for i in range(config["num_files"]):
+                file_name = os.path.join(config["output_dir"], f"sample_{config['start_index'] + i}.g")
+                tasks.append((write_sample, (file_name, config["func"]), config["kwargs"]))
+    
+    chunksize = 1 if SAMPLES_PER_BUNDLE else 256
+    with Pool(os.cpu_count(), initializer=_seed_worker) as pool:
+        for _ in pool.imap_unordered(_run_task, tasks, chunksize=chunksize):
+            pass
+    
     for config in patterns_config:
-        print(f"\nGenerating {config['name']}...")
-        config["func"](
-            config["output_dir"],
-            config["num_files"],
-            config["start_index"],
-            **config["kwargs"]
-        )
+        print(f"Generated {config['num_files']} {config['name']} samples in {config['output_dir']}")
     
     print("\n" + "=" * 50)
     print("Dataset generation completed!")
     total_files = sum(c["num_files"] for c in patterns_config)
-    print(f"Total files generated: {total_files}")
+    print(f"Total samples generated: {total_files}")
 
 
 if __name__ == "__main__":
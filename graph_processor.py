@@ -3,10 +3,11 @@ Graph processing utilities for parsing and converting scene graphs.
 """
 import re
 import numpy as np
-import networkx as nx
 import os
+from concurrent.futures import ProcessPoolExecutor
 import torch
 from torch_geometric.data import Data
+from generate_dataset import BUNDLE_DELIMITER
 
 
 def read_g_file(filename):
@@ -31,104 +32,131 @@ def get_relative_position(G, start_node, end_node):
         return None
 
 
-def parse_transform(transform_string):
-    """Parse transformation string and extract translation vector."""
-    translation_match = re.search(r't\((.*?)\)', transform_string)
-    if translation_match:
-        translation_values = translation_match.group(1)
-        return np.array([float(val) for val in translation_values.split()])
-    return np.zeros(3)
-
-
 # Precompile regular expressions
-position_pattern = re.compile(r'object(\d+).*?X:\s*\[([^\]]+)\]')
-transform_pattern = re.compile(r'object(\d+)\(object(\d+)\).*?Q:\s*"([^"]+)"')
+object_pattern = re.compile(
+    r'^object(\d+)(?:\(object(\d+)\))?.*?(?:X:\s*\[([^\]]+)\]|Q:\s*"([^"]+)")', re.MULTILINE
+)
+translation_pattern = re.compile(r't\((.*?)\)')
 
 
 def process_g_file(filepath):
-    """Process a single .g file and convert it to a graph representation."""
-    g_content = read_g_file(filepath)
+    """Process a single .g file and convert it to a PyTorch Geometric graph."""
+    return parse_g_content(read_g_file(filepath))
+
+
+def process_g_bundle(filepath):
+    """Process every sample in a .gbundle file and return a list of (graph, positions)."""
+    return [(_to_pyg_data(*arrays), positions) for *arrays, positions in _parse_g_bundle(filepath)]
+
+
+def parse_g_content(g_content):
+    """Convert the contents of a single .g scene to a PyTorch Geometric graph."""
+    *arrays, object_positions = _parse_scene(g_content)
+    return _to_pyg_data(*arrays), object_positions
+
 
+def _parse_scene(g_content):
+    """Parse a .g scene into (num_nodes, edge_index, edge_attr, positions) NumPy arrays."""
     object_positions = {}
     object_transformations = {}
 
-    for line in g_content.split('\n'):
-        if line.strip() == "":
-            continue
-
-        position_match = position_pattern.match(line)
-        if position_match:
-            obj_id = int(position_match.group(1)) - 1
-            position = np.array([float(n) for n in position_match.group(2).split(', ')[:3]])
+    # Sweep the file once, then convert all numbers of each kind in one go
+    position_ids, position_strings = [], []
+    transform_ids, translation_strings = [], []
+    for obj_id, base_obj_id, position_string, transform_string in object_pattern.findall(g_content):
+        if position_string:
+            position_ids.append(int(obj_id) - 1)
+            position_strings.append(position_string)
+        elif base_obj_id:
+            translation_match = translation_pattern.search(transform_string)
+            transform_ids.append((int(obj_id) - 1, int(base_obj_id) - 1))
+            translation_strings.append(translation_match.group(1) if translation_match else '0 0 0')
+
+    if position_strings:
+        # X may hold just a position or a position plus quaternion; keep x, y, z
+        xyz_strings = (','.join(s.split(',', 3)[:3]) for s in position_strings)
+        positions = np.fromstring(','.join(xyz_strings), sep=',').reshape(-1, 3)
+        for obj_id, position in zip(position_ids, positions):
             object_positions[obj_id] = position
 
-        transform_match = transform_pattern.match(line)
-        if transform_match:
-            obj_id = int(transform_match.group(1)) - 1
-            base_obj_id = int(transform_match.group(2)) - 1
-            transform_string = transform_match.group(3)
-            transformation = parse_transform(transform_string)
+    if translation_strings:
+        translations = np.fromstring(' '.join(translation_strings), sep=' ').reshape(-1, 3)
+        for (obj_id, base_obj_id), transformation in zip(transform_ids, translations):
             object_transformations[obj_id] = (base_obj_id, transformation)
 
-    G = nx.DiGraph()
-
     # Update positions with transformations
     for obj_id, (base_obj_id, transformation) in object_transformations.items():
         if base_obj_id in object_positions:
             transformed_pos = object_positions[base_obj_id] + transformation
             object_positions[obj_id] = transformed_pos
 
-    # Add edges considering the pair only once
-    for start_id, start_pos in object_positions.items():
-        for end_id, end_pos in object_positions.items():
-            if start_id < end_id:  # Ensures each pair is considered only once
-                relative_pos = end_pos - start_pos
-                if not G.has_edge(end_id, start_id) or not np.array_equal(-relative_pos, G[end_id][start_id]['weight']):
-                    G.add_edge(start_id, end_id, weight=relative_pos)
-    
-    # Ensure edges point upward (remove downward edges)
-    for (u, v, w) in list(G.edges(data='weight')):
-        if w[2] < 0:
-            G.remove_edge(u, v)
-            G.add_edge(v, u, weight=-w)
-    
-    return G, object_positions
-
-
-def process_all_g_files(directory):
-    """Process all .g files in a directory and return graphs and positions."""
-    all_graphs = []
-    all_positions = []
-    for filename in os.listdir(directory):
-        if filename.endswith('.g'):
-            filepath = os.path.join(directory, filename)
-            G, positions = process_g_file(filepath)
-            all_graphs.append(G)
-            all_positions.append(positions)
+    # Add one edge per pair, pointing upward (flip pairs whose relative z is negative)
+    ids = np.array(sorted(object_positions), dtype=np.int64)
+    P = np.array([object_positions[i] for i in ids]).reshape(-1, 3)
+    iu, ju = np.triu_indices(len(ids), k=1)
+    relative_pos = P[ju] - P[iu]
+    flip = relative_pos[:, 2] < 0
+    relative_pos[flip] *= -1
+    u, v = ids[iu], ids[ju]
+    u[flip], v[flip] = ids[ju[flip]], ids[iu[flip]]
+
+    return len(ids), np.stack([u, v]), relative_pos.astype(np.float32), object_positions
+
+
+def _to_pyg_data(num_nodes, edge_index, edge_attr):
+    """Wrap parsed edge arrays in a PyTorch Geometric Data object."""
+    return Data(
+        x=torch.ones((num_nodes, 1)),
+        edge_index=torch.from_numpy(edge_index),
+        edge_attr=torch.from_numpy(edge_attr),
+        y=0
+    )
+
+
+def _parse_g_file(filepath):
+    """Parse a .g file into NumPy arrays (see _parse_scene)."""
+    return _parse_scene(read_g_file(filepath))
+
+
+def _parse_g_bundle(filepath):
+    """Parse every sample in a .gbundle file into NumPy arrays (see _parse_scene)."""
+    return [_parse_scene(sample) for sample in read_g_file(filepath).split(BUNDLE_DELIMITER)]
+
+
+def _map_files(func, paths, chunksize):
+    """Map func over paths, using a process pool once there are enough of them."""
+    # Small inputs (e.g. a single target scene) are not worth the pool start-up
+    if len(paths) < 2 * chunksize:
+        return [func(path) for path in paths]
+    with ProcessPoolExecutor() as executor:
+        return list(executor.map(func, paths, chunksize=chunksize))
+
+
+def process_all_g_files(directory, chunksize=64):
+    """Process all .g and .gbundle files in a directory and return graphs and positions."""
+    entries = list(os.scandir(directory))
+    paths = [entry.path for entry in entries if entry.name.endswith('.g')]
+    bundle_paths = [entry.path for entry in entries if entry.name.endswith('.gbundle')]
+
+    # Files are independent, so parse large directories across processes. Workers
+    # return plain arrays; tensors are built here, since torch would otherwise
+    # ship every tensor back through its own shared-memory file descriptor
+    results = _map_files(_parse_g_file, paths, chunksize)
+    for bundle_results in _map_files(_parse_g_bundle, bundle_paths, 1):
+        results.extend(bundle_results)
+
+    all_graphs = [_to_pyg_data(*arrays) for *arrays, _ in results]
+    all_positions = [positions for *_, positions in results]
     return all_graphs, all_positions
 
 
 def convert_to_pyg_data(graph):
     """Convert a NetworkX graph to PyTorch Geometric Data format."""
     node_features = torch.ones((graph.number_of_nodes(), 1))
-    edge_index = torch.tensor(list(graph.edges), dtype=torch.long).t().contiguous()
-    edge_attr = torch.tensor([graph[u][v]['weight'] for u, v in graph.edges()], dtype=torch.float)
+    edges = list(graph.edges(data='weight'))
+    edge_index = np.array([(u, v) for u, v, _ in edges], dtype=np.int64).reshape(-1, 2).T
+    edge_attr = np.array([w for _, _, w in edges], dtype=np.float32).reshape(-1, 3)
+    edge_index = torch.from_numpy(np.ascontiguousarray(edge_index))
+    edge_attr = torch.from_numpy(edge_attr)
     return Data(x=node_features, edge_index=edge_index, edge_attr=edge_attr, y=0)
 
-
-def correct_graph_edge_indices(graphs):
-    """Correct edge indices in graphs (shift by -1 if needed)."""
-    for graph in graphs:
-        corrected_edges_with_attrs = []
-
-        # Store edges with corrected indices and their attributes
-        for u, v, attrs in graph.edges(data=True):
-            corrected_u = u - 1 if u > 0 else u
-            corrected_v = v - 1 if v > 0 else v
-            corrected_edges_with_attrs.append((corrected_u, corrected_v, attrs))
-
-        # Clear existing edges and re-add them with original attributes
-        graph.clear_edges()
-        for u, v, attrs in corrected_edges_with_attrs:
-            graph.add_edge(u, v, **attrs)
-
@@ -5,11 +5,7 @@ import torch
 import robotic as ry
 import time
 from model import GNNModel
-from graph_processor import (
-    process_all_g_files,
-    convert_to_pyg_data,
-    correct_graph_edge_indices
-)
+from graph_processor import process_all_g_files
 from planner import create_plan
 from motion_planner import init_komo, define_optimization
 
@@ -25,6 +21,10 @@ def optimize(obj_index, config):
     Returns:
         Tuple of (path, result, komo object)
     """
+    # A fresh KOMO is built per call on purpose: it copies the configuration
+    # at construction (which changes between placements via setFrameState),
+    # and the grasp/place mode switches rewire its kinematic tree per object,
+    # which clearObjectives() does not undo
     komo = ry.KOMO(config, 3, 30, 1, False)
     define_optimization(config, obj_index, komo)
     ret = ry.NLP_Solver(komo.nlp(), verbose=0).solve()
@@ -38,6 +38,9 @@ def main():
     in_channels = 1
     hidden_channels = 32
     out_channels = 1
+    # Compiling costs tens of seconds up front while an eager plan takes about
+    # a millisecond, so only enable it for long planning sessions
+    compile_model = False
     
     # Initialize robot configurations
     config = ry.Config()
@@ -47,15 +50,17 @@ def main():
     model = GNNModel(in_channels, hidden_channels, out_channels)
     model_path = 'trained_model.pth'
     model.load_state_dict(torch.load(model_path))
+    if compile_model:
+        # The graph shrinks by one node per step, so compile for dynamic shapes
+        model = torch.compile(model, dynamic=True)
     
-    # Process target configuration
+    # Process target configuration once; replans reuse the parsed graph
     target_folder = 'target'
     target_graph, pos = process_all_g_files(target_folder)
-    correct_graph_edge_indices(target_graph)
-    target_pyg = [convert_to_pyg_data(graph) for graph, positions in zip(target_graph, pos)][0]
+    target_pyg = target_graph[0]
     
     # Generate initial plan
-    plan = create_plan(target_folder, model, option=1)
+    plan = create_plan(model, target_pyg)
     building_order = plan[0]
     print("Building Order:", building_order)
     
@@ -83,7 +88,7 @@ def main():
             graph = plan[1]
             
             # Replan for remaining objects
-            plan = create_plan(target_folder, model, graph=graph, option=2)
+            plan = create_plan(model, graph)
             building_order = plan[0]
             print(f"Updated Building Order: {building_order}")
             
@@ -106,9 +111,9 @@ def main():
         else:
             print("Plan infeasible. Replanning...")
             if checkpoint_counter == 0:
-                building_order = create_plan(target_folder, model, option=1)[0]
+                building_order = create_plan(model, target_pyg)[0]
             else:
-                building_order = create_plan(target_folder, model, graph=graph, option=2)[0]
+                building_order = create_plan(model, graph)[0]
 
 
 if __name__ == "__main__":